@@ -1,23 +1,46 @@
 # app/app_streamlit.py
 import os
+import mmap
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from typing import Optional
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 
+try:
+    import xxhash
+    def _new_hasher():
+        return xxhash.xxh3_64()
+except ImportError:  # optional; blake2b is the fastest stdlib fallback
+    import hashlib
+    def _new_hasher():
+        return hashlib.blake2b(digest_size=16)
+
+from trip_splitter.session_io import parse_session_json, write_csv
 from trip_splitter.schemas import TRIP_NAME, EXPENSE_CATEGORIES, SUPPORTED_CURRENCIES
 from trip_splitter.logic import (
     load_all_data,
+    data_dir_signature,
     convert_expenses_to_base,
     compute_allocations,
     compute_balances,
     compute_settlement,
+    compute_category_totals,
 )
-from trip_splitter.build_or_update import build_workbook_bytes
 
 st.set_page_config(page_title="Trip Expense Settlement", layout="wide")
 
+# Copy-on-Write lets session frames be shared without defensive .copy() calls
+# (always on, and the option deprecated, in pandas >= 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    try:
+        pd.set_option("mode.copy_on_write", True)
+    except Exception:
+        pass
+
 # Global CSS to improve printing of long tables
 st.markdown(
     """
@@ -59,14 +82,124 @@ st.markdown(
 # -----------------------------
 # Helpers
 # -----------------------------
+# Free-text columns kept as Arrow-backed strings in session state
+TEXT_COLUMNS = {
+    "participants": ("Name",),
+    "rates": ("Currency",),
+    "expenses": ("ExpID", "Description", "Payer", "DriveURL"),
+    "splits": ("ExpID", "Participant"),
+}
+
+# Low-cardinality columns stored as categoricals (values are validated on load)
+CATEGORICAL_COLUMNS = {
+    "expenses": {"Category": EXPENSE_CATEGORIES, "Currency": SUPPORTED_CURRENCIES},
+}
+
+# Arrow-backed string dtype that keeps NaN (not pd.NA) as the missing value,
+# so downstream code (openpyxl, JSON snapshots) sees the same values as before
+try:
+    ARROW_STRING = pd.StringDtype("pyarrow", na_value=np.nan)  # pandas >= 2.3
+except TypeError:
+    try:
+        ARROW_STRING = pd.StringDtype("pyarrow_numpy")         # pandas 2.1/2.2
+    except Exception:
+        ARROW_STRING = None
+
+@st.cache_data(show_spinner=False)
+def _cached_load_all_data(data_dir: str, sig: tuple) -> dict:
+    # sig is only part of the cache key; it invalidates stale entries
+    data = load_all_data(data_dir)
+    return {
+        k: to_categoricals(to_arrow_strings(df, TEXT_COLUMNS.get(k, ())), CATEGORICAL_COLUMNS.get(k, {}))
+        for k, df in data.items()
+    }
+
+def to_arrow_strings(df: pd.DataFrame, columns) -> pd.DataFrame:
+    # Object-dtype text is re-encoded to Arrow on every st.dataframe/st.data_editor
+    # call; Arrow-backed strings are handed over as-is (no-op on pandas >= 3).
+    if ARROW_STRING is None:
+        return df
+    cols = {c: ARROW_STRING for c in columns if c in df.columns and df[c].dtype == object}
+    return df.astype(cols) if cols else df
+
+def to_categoricals(df: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    # Fixed category lists keep the editor's selectbox options valid for new rows
+    cols = {c: pd.CategoricalDtype(cats) for c, cats in columns.items() if c in df.columns}
+    return df.astype(cols) if cols else df
+
+def _hash_arrow_array(h, arr):
+    # offset + length pin down which part of a (possibly shared) buffer is used
+    h.update(arr.offset.to_bytes(8, "little") + len(arr).to_bytes(8, "little"))
+    for buf in arr.buffers():
+        if buf is not None:
+            h.update(buf)
+    if pa.types.is_dictionary(arr.type):
+        _hash_arrow_array(h, arr.dictionary)
+
+def df_hash(df: pd.DataFrame) -> str:
+    # Content fingerprint for cache keys: hashes the Arrow buffers in place
+    # instead of pandas' per-row hashing
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowException, TypeError, ValueError):
+        # e.g. mixed-type object columns from the editor
+        h = _new_hasher()
+        h.update(repr(list(df.columns)).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+        return h.hexdigest()
+    h = _new_hasher()
+    h.update(table.schema.to_string(show_schema_metadata=False).encode("utf-8"))
+    for col in table.columns:
+        for chunk in col.chunks:
+            _hash_arrow_array(h, chunk)
+    return h.hexdigest()
+
+# Cached pipeline stages: the *_hash args form the cache key, the underscored
+# DataFrame args are skipped by Streamlit's own (slower) hashing.
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_convert(exp_hash, rates_hash, _expenses: pd.DataFrame, _rates: pd.DataFrame) -> pd.DataFrame:
+    return convert_expenses_to_base(_expenses, _rates)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_allocations(key, _expenses_vnd: pd.DataFrame, _splits: pd.DataFrame, _participants: pd.DataFrame) -> pd.DataFrame:
+    return compute_allocations(_expenses_vnd, _splits, _participants)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_balances(key, _expenses_vnd: pd.DataFrame, _allocations: pd.DataFrame, _participants: pd.DataFrame) -> pd.DataFrame:
+    return compute_balances(_expenses_vnd, _allocations, _participants)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_settlement(key, _balances: pd.DataFrame) -> pd.DataFrame:
+    return compute_settlement(_balances)
+
+@st.cache_resource
+def _visible_columns_cache() -> dict:
+    # Process-wide (module globals are rebuilt on every rerun)
+    return {}
+
+# Columns not starting with the helper prefix. Memoized per columns Index object:
+# pandas swaps in a new Index whenever columns change, and a weakref callback
+# drops the entry once the old Index is gone.
+def visible_columns(df: pd.DataFrame, exclude_prefix: str = "__") -> list:
+    cache = _visible_columns_cache()
+    cols = df.columns
+    key = (id(cols), exclude_prefix)
+    hit = cache.get(key)
+    if hit is not None and hit[0]() is cols:
+        return hit[1]
+    visible = cols[~cols.astype(str).str.startswith(exclude_prefix)].tolist()
+    cache[key] = (weakref.ref(cols, lambda _, key=key: cache.pop(key, None)), visible)
+    return visible
+
 def save_df_csv(df: pd.DataFrame, path: str):
-    # Drop completely empty rows (all NaN)
-    df = df.dropna(how="all")
     # Drop any temporary helper columns (e.g., delete markers)
-    df = df[[c for c in df.columns if not str(c).startswith("__")]]
-    # Replace NaN with empty string for CSV friendliness
-    df = df.fillna("")
-    df.to_csv(path, index=False)
+    keep_cols = visible_columns(df)
+    df = df[keep_cols]
+    # Drop completely empty rows (all NaN); skip the row filter copy when none exist
+    empty = df.isna().all(axis=1)
+    if empty.any():
+        df = df.loc[~empty]
+    write_csv(df, path)
 
 # Remove ID and hyperlink-like columns for printing
 def sanitize_for_print(df: pd.DataFrame, extra_drop: Optional[list] = None) -> pd.DataFrame:
@@ -124,6 +257,49 @@ def render_print_table(df: pd.DataFrame):
         pass
     st.table(styler)
 
+# Workbook bytes for the current session frames; repeated clicks without edits
+# reuse the last build
+@st.cache_data(max_entries=4, show_spinner="Building workbook...")
+def _cached_workbook_bytes(key, _dfs: dict) -> bytes:
+    # Imported lazily: openpyxl is only needed once the user exports
+    from trip_splitter.build_or_update import build_workbook_bytes_from_dfs
+    return build_workbook_bytes_from_dfs(
+        _dfs["participants"], _dfs["rates"], _dfs["expenses"], _dfs["splits"]
+    )
+
+# Summary tables, keyed on the hash of the columns they read
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_totals_by_cat(h, _expenses_vnd: pd.DataFrame) -> pd.DataFrame:
+    return compute_category_totals(_expenses_vnd)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_person_totals(h, _balances: pd.DataFrame):
+    totals_by_person = _balances[["Participant", "Paid_Base", "Owed_Base", "Net_Base"]]
+    return totals_by_person, totals_by_person.set_index("Participant")[["Paid_Base", "Owed_Base", "Net_Base"]]
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _csv_bytes(key, _df: pd.DataFrame) -> bytes:
+    return _df.to_csv(index=False).encode("utf-8")
+
+# Render only the first max_rows rows; the full table is offered as a CSV download
+def render_preview_table(df: pd.DataFrame, max_rows: int, key: str):
+    st.caption(f"Showing {min(len(df), max_rows):,} of {len(df):,} rows")
+    st.dataframe(df.head(max_rows), use_container_width=True)
+    if len(df) > max_rows:
+        st.download_button(
+            "Download full CSV",
+            data=_csv_bytes(df_hash(df), df),
+            file_name=f"{key}.csv",
+            mime="text/csv",
+            key=f"{key}_download_csv",
+        )
+
+# Remove rows ticked in the __delete__ helper column (and the column itself)
+def drop_deleted_rows(df: pd.DataFrame) -> pd.DataFrame:
+    mask = df["__delete__"].to_numpy(dtype=bool, na_value=False)
+    # Select rows and non-helper columns in one indexing step instead of filter + drop
+    return df.loc[~mask, visible_columns(df)].reset_index(drop=True)
+
 def editable_table(label: str, df: pd.DataFrame, key: str):
     st.caption(label)
     st.caption("Tip: Click 'Add row' to add; use the row menu to delete.")
@@ -134,11 +310,23 @@ def editable_table(label: str, df: pd.DataFrame, key: str):
         key=key,
         num_rows="dynamic",
     )
-    return edited
+    return df if not editor_has_changes(key) else edited
+
+# The editor's widget state holds the diff against its input frame; when it is
+# empty, callers keep the input object (and every cache keyed on it) as-is
+def editor_has_changes(key: str) -> bool:
+    state = st.session_state.get(key) or {}
+    return bool(state.get("edited_rows") or state.get("added_rows") or state.get("deleted_rows"))
+
+# Content-keyed fallback for apply_sort_controls: a frame that is a new object
+# but has the same data (e.g. after Reload) is not sorted again
+@st.cache_data(max_entries=16, show_spinner=False)
+def _sorted_frame(h, col, asc: bool, _df: pd.DataFrame) -> pd.DataFrame:
+    return _df.sort_values(by=col, ascending=asc, kind="stable", ignore_index=True)
 
 def apply_sort_controls(df: pd.DataFrame, key_prefix: str, default_col: Optional[str] = None, exclude_prefix: str = "__", show_ui: bool = True) -> pd.DataFrame:
     # Exclude helper columns (like __delete__)
-    sort_columns = [c for c in df.columns if not str(c).startswith(exclude_prefix)]
+    sort_columns = visible_columns(df, exclude_prefix)
     if not sort_columns:
         return df
     # Persisted prefs container
@@ -184,10 +372,20 @@ def apply_sort_controls(df: pd.DataFrame, key_prefix: str, default_col: Optional
     # Apply persisted sort if present
     prefs = st.session_state.sort_prefs.get(key_prefix, {})
     if "col" in prefs:
+        # Reuse the last sorted frame while neither the source frame nor the
+        # prefs changed; holding the source itself avoids id() reuse after GC
+        if "sorted_cache" not in st.session_state:
+            st.session_state.sorted_cache = {}
+        col, asc = prefs["col"], prefs.get("asc", True)
+        cached = st.session_state.sorted_cache.get(key_prefix)
+        if cached is not None and cached[0] == col and cached[1] == asc and cached[2] is df:
+            return cached[3]
         try:
-            return df.sort_values(by=prefs["col"], ascending=prefs.get("asc", True), kind="mergesort", ignore_index=True)
+            sorted_df = _sorted_frame(df_hash(df), col, asc, df)
         except Exception:
             return df
+        st.session_state.sorted_cache[key_prefix] = (col, asc, df, sorted_df)
+        return sorted_df
     return df
 
 # -----------------------------
@@ -196,35 +394,81 @@ def apply_sort_controls(df: pd.DataFrame, key_prefix: str, default_col: Optional
 def session_to_json_bytes() -> bytes:
     import json, time
     payload = {
-        "dfs": {k: v.to_dict(orient="records") for k, v in st.session_state.dfs.items()},
+        # Column-major "split" layout is serialized by pandas in C, not row dicts
+        "dfs": {
+            k: {
+                **json.loads(v.to_json(orient="split", index=False, date_format="iso")),
+                # dtype hints let the loader restore types without guessing
+                "dtypes": {str(c): str(t) for c, t in v.dtypes.items()},
+            }
+            for k, v in st.session_state.dfs.items()
+        },
         "sort_prefs": st.session_state.get("sort_prefs", {}),
-        "auto_preview": st.session_state.get("auto_preview", True),
+        "auto_preview": st.session_state.get("auto_preview", False),
         "data_dir": st.session_state.get("loaded_data_dir", "sample_data"),
         "ts": time.time(),
     }
     # default=str ensures pandas.Timestamp, numpy types, etc. are serialized
     return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
 
+# Re-apply snapshot dtype hints for datetime/numeric/bool columns; text columns
+# are left as parsed (and categoricals are handled by to_categoricals)
+def restore_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        try:
+            if dtype.startswith("datetime64"):
+                df[col] = pd.to_datetime(df[col], errors="coerce")
+            elif dtype == "bool" or dtype.startswith(("int", "float")):
+                df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            pass
+    return df
+
+# Snapshots without dtype hints: parse Date-like columns back to datetime
+def _parse_date_columns(df: pd.DataFrame) -> pd.DataFrame:
+    date_cols = [c for c in df.columns if str(c).lower() in {"date", "timestamp"}]
+    if date_cols:
+        df[date_cols] = df[date_cols].apply(pd.to_datetime, errors="coerce")
+    return df
+
 def load_session_from_json_bytes(file_bytes: bytes):
-    import json
-    payload = json.loads(file_bytes.decode("utf-8"))
+    # file_bytes may be bytes, a memoryview or an mmap
+    payload = parse_session_json(file_bytes)
     # Reconstruct DataFrames; parse Date-like columns back to datetime if present
     dfs = {}
     for k, rows in payload.get("dfs", {}).items():
-        df = pd.DataFrame(rows)
-        for col in df.columns:
-            if col.lower() in {"date", "timestamp"}:
-                try:
-                    df[col] = pd.to_datetime(df[col], errors="ignore")
-                except Exception:
-                    pass
-        dfs[k] = df
+        if isinstance(rows, dict):
+            # "split" snapshot: build straight from the parsed column/data lists
+            # (no second JSON round-trip through read_json)
+            df = pd.DataFrame(rows.get("data", []), columns=rows.get("columns"))
+            dtypes = rows.get("dtypes")
+            df = restore_dtypes(df, dtypes) if dtypes is not None else _parse_date_columns(df)
+            dfs[k] = to_categoricals(df, CATEGORICAL_COLUMNS.get(k, {}))
+            continue
+        # Older snapshots stored a list of row records
+        dfs[k] = _parse_date_columns(pd.DataFrame(rows))
     st.session_state.dfs = dfs
     st.session_state.sort_prefs = payload.get("sort_prefs", {})
-    st.session_state.auto_preview = payload.get("auto_preview", True)
+    st.session_state.auto_preview = payload.get("auto_preview", False)
     st.session_state.loaded_data_dir = payload.get("data_dir", "sample_data")
     st.rerun()
 
+@st.cache_resource
+def ensure_sessions_dir(path: str) -> str:
+    # Created once per server process instead of on every rerun
+    os.makedirs(path, exist_ok=True)
+    return path
+
+@st.cache_data(ttl=2, show_spinner=False)
+def list_session_slots(path: str) -> list:
+    # Short TTL picks up slots written by other sessions; Save slot clears it
+    try:
+        return sorted(f for f in os.listdir(path) if f.endswith('.json'))
+    except Exception:
+        return []
+
 
 # -----------------------------
 # Sidebar controls
@@ -239,11 +483,12 @@ save_clicked = col2.button("Save CSVs")
 
 gen_excel = st.sidebar.button("Generate Excel")
 st.sidebar.caption("Excel includes: Settlement, Balances, Allocations, Expenses, Summary.")
-auto_preview = st.sidebar.checkbox("Auto-preview", value=True, help="If off, preview updates only when you click 'Run preview'.")
+auto_preview = st.sidebar.toggle("Auto-preview", value=False, help="If off, preview updates only when you click 'Run preview'.")
 run_preview_clicked = st.sidebar.button("Run preview")
 
 # Print view toggle to render static, non-scroll tables for printing
 print_view = st.sidebar.toggle("Print view", value=False, help="Use static full-length tables for printing.")
+max_preview_rows = st.sidebar.number_input("Preview rows", min_value=50, max_value=5000, value=200, step=50, help="Rows shown per table in Preview; print view always shows everything.")
 
 # Session save/load controls
 st.sidebar.markdown("---")
@@ -266,15 +511,14 @@ with col_ss2:
 uploaded = st.sidebar.file_uploader("Load session JSON", type=["json"], accept_multiple_files=False)
 if uploaded is not None:
     try:
-        load_session_from_json_bytes(uploaded.read())
+        load_session_from_json_bytes(uploaded.getbuffer())
     except Exception as e:
         st.sidebar.error(f"Failed to load session: {e}")
 
 # Disk save slots
 st.sidebar.markdown("---")
 st.sidebar.subheader("Save slots")
-sessions_dir = ".sessions"
-os.makedirs(sessions_dir, exist_ok=True)
+sessions_dir = ensure_sessions_dir(".sessions")
 slot_name = st.sidebar.text_input("Slot name", value="latest")
 col_slot1, col_slot2 = st.sidebar.columns(2)
 with col_slot1:
@@ -283,21 +527,19 @@ with col_slot1:
             path = os.path.join(sessions_dir, f"{slot_name}.json")
             with open(path, "wb") as f:
                 f.write(session_to_json_bytes())
+            list_session_slots.clear()
             st.sidebar.success(f"Saved {path}")
         except Exception as e:
             st.sidebar.error(f"Failed to save slot: {e}")
 with col_slot2:
     # List available slots
-    try:
-        files = sorted([f for f in os.listdir(sessions_dir) if f.endswith('.json')])
-    except Exception:
-        files = []
+    files = list_session_slots(sessions_dir)
     selected_slot = st.selectbox("Load slot", files, index=files.index("latest.json") if "latest.json" in files else (len(files)-1 if files else 0))
     if st.button("Load slot") and selected_slot:
         try:
             path = os.path.join(sessions_dir, selected_slot)
-            with open(path, "rb") as f:
-                load_session_from_json_bytes(f.read())
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                load_session_from_json_bytes(mm)
         except Exception as e:
             st.sidebar.error(f"Failed to load slot: {e}")
 
@@ -310,21 +552,11 @@ if reload_clicked and not os.path.isdir(data_dir):
 
 if "dfs" not in st.session_state or reload_clicked:
     load_dir = data_dir if os.path.isdir(data_dir) else "sample_data"
-    data = load_all_data(load_dir)
-    st.session_state.dfs = {
-        "participants": data["participants"].copy(),
-        "rates": data["rates"].copy(),
-        "expenses": data["expenses"].copy(),
-        "splits": data["splits"].copy(),
-    }
+    data = _cached_load_all_data(load_dir, data_dir_signature(load_dir))
+    # st.cache_data hands back fresh objects on every call, so no copy is needed
+    st.session_state.dfs = dict(data)
     st.session_state.loaded_data_dir = load_dir
 
-# Bind locals to current state for easier use below
-participants = st.session_state.dfs["participants"]
-rates        = st.session_state.dfs["rates"]
-expenses     = st.session_state.dfs["expenses"]
-splits       = st.session_state.dfs["splits"]
-
 # -----------------------------
 # Tabs
 # -----------------------------
@@ -332,7 +564,15 @@ tab_p, tab_r, tab_e, tab_s, tab_prev, tab_sum = st.tabs(
     ["Participants", "Rates", "Expenses", "Splits", "Preview", "Summary"]
 )
 
-with tab_p:
+# Edits inside a tab only rerun its fragment, which skips the pipeline; with
+# Auto-preview on, follow an applied edit with a full rerun to refresh results
+def rerun_if_auto_preview():
+    if auto_preview:
+        st.rerun()
+
+@st.fragment
+def render_participants_tab(print_view: bool):
+    participants = st.session_state.dfs["participants"]
     st.subheader("Participants")
     participants = apply_sort_controls(participants, key_prefix="participants", default_col=participants.columns[0] if not participants.empty else None, show_ui=not print_view)
     if print_view:
@@ -342,12 +582,18 @@ with tab_p:
         with st.form("participants_form"):
             edited_participants = editable_table("participants.csv", participants, key="participants")
             submitted = st.form_submit_button("Apply changes")
-        if submitted:
+        if submitted and edited_participants is not participants:
             st.session_state.dfs["participants"] = edited_participants
             participants = edited_participants
+            rerun_if_auto_preview()
         st.info("Weights default to 1.0; you can adjust here or per-expense via WeightOverride in Splits.")
 
-with tab_r:
+with tab_p:
+    render_participants_tab(print_view)
+
+@st.fragment
+def render_rates_tab(print_view: bool):
+    rates = st.session_state.dfs["rates"]
     st.subheader("Rates (to VND)")
     st.caption("Enter manual daily FX rates. VND must be 1.")
     rates = apply_sort_controls(rates, key_prefix="rates", default_col=rates.columns[0] if not rates.empty else None, show_ui=not print_view)
@@ -358,11 +604,17 @@ with tab_r:
         with st.form("rates_form"):
             edited_rates = editable_table("rates.csv", rates, key="rates")
             submitted = st.form_submit_button("Apply changes")
-        if submitted:
+        if submitted and edited_rates is not rates:
             st.session_state.dfs["rates"] = edited_rates
             rates = edited_rates
+            rerun_if_auto_preview()
 
-with tab_e:
+with tab_r:
+    render_rates_tab(print_view)
+
+@st.fragment
+def render_expenses_tab(print_view: bool):
+    expenses = st.session_state.dfs["expenses"]
     st.subheader("Expenses")
     st.caption("DriveURL becomes a 🧾 hyperlink in Excel. Categories and currency must be valid.")
     st.caption("Tip: Click 'Add row' to add; use the row menu to delete.")
@@ -371,10 +623,11 @@ with tab_e:
         f"- Allowed categories: `{', '.join(EXPENSE_CATEGORIES)}`  \n"
         f"- Supported currencies: `{', '.join(SUPPORTED_CURRENCIES)}`"
     )
+    # Sort the session frame itself so the sorted result can be reused across reruns
+    expenses = apply_sort_controls(expenses, key_prefix="expenses", default_col="Date" if "Date" in expenses.columns else None, show_ui=not print_view)
     # Add a helper checkbox column for deletions (not saved to CSV)
     if "__delete__" not in expenses.columns:
-        expenses["__delete__"] = False
-    expenses = apply_sort_controls(expenses, key_prefix="expenses", default_col="Date" if "Date" in expenses.columns else None, show_ui=not print_view)
+        expenses = expenses.assign(__delete__=False)
     if print_view:
         st.caption("expenses.csv (print view)")
         render_print_table(sanitize_for_print(expenses, extra_drop=["__delete__"]))
@@ -383,7 +636,7 @@ with tab_e:
         with col_del_e1:
             del_expenses_clicked = st.button("Delete selected rows", key="del_expenses")
         with st.form("expenses_form"):
-            expenses = st.data_editor(
+            edited_expenses = st.data_editor(
                 expenses,
                 use_container_width=True,
                 hide_index=True,
@@ -405,19 +658,29 @@ with tab_e:
                 },
             )
             apply_expenses = st.form_submit_button("Apply changes")
+        shown_expenses = expenses
+        if editor_has_changes("expenses"):
+            expenses = edited_expenses
         if del_expenses_clicked and "__delete__" in expenses.columns:
-            expenses = expenses[~expenses["__delete__"].fillna(False)].drop(columns=["__delete__"], errors="ignore").reset_index(drop=True)
-        if apply_expenses:
+            expenses = drop_deleted_rows(expenses)
+        if apply_expenses and expenses is not shown_expenses:
             st.session_state.dfs["expenses"] = expenses
+            rerun_if_auto_preview()
 
-with tab_s:
+with tab_e:
+    render_expenses_tab(print_view)
+
+@st.fragment
+def render_splits_tab(print_view: bool):
+    splits = st.session_state.dfs["splits"]
     st.subheader("Splits (long format)")
     st.caption("Included = TRUE/FALSE. WeightOverride blank → use DefaultWeight from Participants.")
     st.caption("Tip: Click 'Add row' to add; use the row menu to delete.")
+    # Sort the session frame itself so the sorted result can be reused across reruns
+    splits = apply_sort_controls(splits, key_prefix="splits", default_col="ExpenseID" if "ExpenseID" in splits.columns else None, show_ui=not print_view)
     # Add a helper checkbox column for deletions (not saved to CSV)
     if "__delete__" not in splits.columns:
-        splits["__delete__"] = False
-    splits = apply_sort_controls(splits, key_prefix="splits", default_col="ExpenseID" if "ExpenseID" in splits.columns else None, show_ui=not print_view)
+        splits = splits.assign(__delete__=False)
     if print_view:
         st.caption("splits.csv (print view)")
         render_print_table(sanitize_for_print(splits, extra_drop=["__delete__"]))
@@ -426,7 +689,7 @@ with tab_s:
         with col_del_s1:
             del_splits_clicked = st.button("Delete selected rows", key="del_splits")
         with st.form("splits_form"):
-            splits = st.data_editor(
+            edited_splits = st.data_editor(
                 splits,
                 use_container_width=True,
                 hide_index=True,
@@ -441,10 +704,18 @@ with tab_s:
                 },
             )
             apply_splits = st.form_submit_button("Apply changes")
+        shown_splits = splits
+        if editor_has_changes("splits"):
+            splits = edited_splits
         if del_splits_clicked and "__delete__" in splits.columns:
-            splits = splits[~splits["__delete__"].fillna(False)].drop(columns=["__delete__"], errors="ignore").reset_index(drop=True)
-        if apply_splits:
+            splits = drop_deleted_rows(splits)
+        if apply_splits and splits is not shown_splits:
             st.session_state.dfs["splits"] = splits
+            rerun_if_auto_preview()
+
+with tab_s:
+    render_splits_tab(print_view)
+
 
 # -----------------------------
 # Pipeline (Preview)
@@ -452,40 +723,65 @@ with tab_s:
 should_run_preview = auto_preview or run_preview_clicked
 try:
     if should_run_preview:
-        expenses_vnd = convert_expenses_to_base(st.session_state.dfs["expenses"], st.session_state.dfs["rates"])
-        allocations  = compute_allocations(expenses_vnd, st.session_state.dfs["splits"], st.session_state.dfs["participants"])
-        balances     = compute_balances(expenses_vnd, allocations, st.session_state.dfs["participants"])
-        settlement   = compute_settlement(balances)
-    else:
-        expenses_vnd = allocations = balances = settlement = None
+        # Read applied state once; the tab locals may hold sorted/unapplied views
+        dfs = st.session_state.dfs
+        p_in, r_in, e_in, s_in = dfs["participants"], dfs["rates"], dfs["expenses"], dfs["splits"]
+        # Downstream stages are keyed on the raw input hashes, so nothing is re-hashed
+        key = (df_hash(e_in), df_hash(r_in), df_hash(s_in), df_hash(p_in))
+        # Inputs unchanged since the stored preview: skip even the cache lookups
+        if key != st.session_state.get("_last_pipeline_hash") or not st.session_state.get("preview"):
+            expenses_vnd = _cached_convert(key[0], key[1], e_in, r_in)
+            allocations  = _cached_allocations(key, expenses_vnd, s_in, p_in)
+            balances     = _cached_balances(key, expenses_vnd, allocations, p_in)
+            settlement   = _cached_settlement(key, balances)
+            # Keep results so Preview/Summary can render between runs without recomputing
+            st.session_state.preview = {
+                "expenses_vnd": expenses_vnd,
+                "allocations": allocations,
+                "balances": balances,
+                "settlement": settlement,
+            }
+            st.session_state._last_pipeline_hash = key
 except Exception as e:
     with tab_prev:
         st.error(f"Pipeline error: {e}")
-    settlement = balances = allocations = expenses_vnd = None
+    st.session_state.preview = None
+
+# Render from the last successful run
+preview = st.session_state.get("preview")
+if preview:
+    expenses_vnd = preview["expenses_vnd"]
+    allocations  = preview["allocations"]
+    balances     = preview["balances"]
+    settlement   = preview["settlement"]
+else:
+    expenses_vnd = allocations = balances = settlement = None
 
 with tab_prev:
     st.subheader("Report" if print_view else "Preview Results")
     if print_view:
         st.markdown(f"**Trip:** {TRIP_NAME}")
+    if expenses_vnd is not None and not should_run_preview and not print_view:
+        st.caption("Showing results from the last run. Click 'Run preview' to refresh.")
     if expenses_vnd is not None:
         st.markdown("**Expenses (with Amount_Base in VND)**")
         if print_view:
             render_print_table(sanitize_for_print(expenses_vnd))
         else:
-            st.dataframe(expenses_vnd, use_container_width=True)
+            render_preview_table(expenses_vnd, max_preview_rows, key="expenses_vnd")
         if not print_view:
             st.markdown("**Allocations** (per expense & participant)")
-            st.dataframe(allocations, use_container_width=True)
+            render_preview_table(allocations, max_preview_rows, key="allocations")
         st.markdown("**Balances** (per participant)")
         if print_view:
             render_print_table(balances)
         else:
-            st.dataframe(balances, use_container_width=True)
+            render_preview_table(balances, max_preview_rows, key="balances")
         st.markdown("**Settlement** (fewest transactions)")
         if print_view:
             render_print_table(settlement)
         else:
-            st.dataframe(settlement, use_container_width=True)
+            render_preview_table(settlement, max_preview_rows, key="settlement")
     else:
         if auto_preview:
             st.info("Fix the error above to see previews.")
@@ -495,17 +791,19 @@ with tab_prev:
 # -----------------------------
 # Summary tab (lightweight)
 # -----------------------------
-with tab_sum:
+# Runs as a fragment so reruns scoped to other tabs never re-serialize the chart
+@st.fragment
+def render_summary_tab(expenses_vnd: Optional[pd.DataFrame], balances: Optional[pd.DataFrame], print_view: bool):
     st.subheader("Summary")
     if expenses_vnd is not None:
-        totals_by_cat = expenses_vnd.groupby("Category")["Amount_Base"].sum().reset_index()
+        totals_by_cat = _cached_totals_by_cat(df_hash(expenses_vnd[["Category", "Amount_Base"]]), expenses_vnd)
         st.markdown("**Totals by Category (VND)**")
         if print_view:
             render_print_table(totals_by_cat)
         else:
             st.dataframe(totals_by_cat, use_container_width=True)
 
-        totals_by_person = balances[["Participant", "Paid_Base", "Owed_Base", "Net_Base"]]
+        totals_by_person, person_chart = _cached_person_totals(df_hash(balances), balances)
         st.markdown("**Per Participant (VND)**")
         if print_view:
             render_print_table(totals_by_person)
@@ -513,19 +811,25 @@ with tab_sum:
             st.dataframe(totals_by_person, use_container_width=True)
 
         st.markdown("**Charts**")
-        st.bar_chart(totals_by_person.set_index("Participant")[["Paid_Base", "Owed_Base", "Net_Base"]])
+        st.bar_chart(person_chart)
     else:
         st.info("Run pipeline successfully to see summaries.")
 
+with tab_sum:
+    render_summary_tab(expenses_vnd, balances, print_view)
+
 # -----------------------------
 # Save CSVs (optional)
 # -----------------------------
 if save_clicked:
     try:
-        save_df_csv(st.session_state.dfs["participants"], os.path.join(data_dir, "participants.csv"))
-        save_df_csv(st.session_state.dfs["rates"],        os.path.join(data_dir, "rates.csv"))
-        save_df_csv(st.session_state.dfs["expenses"],     os.path.join(data_dir, "expenses.csv"))
-        save_df_csv(st.session_state.dfs["splits"],       os.path.join(data_dir, "splits.csv"))
+        # Write the four files concurrently; to_csv spends most of its time in I/O
+        dfs = st.session_state.dfs
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            list(ex.map(
+                lambda name: save_df_csv(dfs[name], os.path.join(data_dir, f"{name}.csv")),
+                ("participants", "rates", "expenses", "splits"),
+            ))
         st.sidebar.success("CSV files saved.")
     except Exception as e:
         st.sidebar.error(f"Failed to save CSVs: {e}")
@@ -535,7 +839,8 @@ if save_clicked:
 # -----------------------------
 if gen_excel:
     try:
-        xlsx_bytes = build_workbook_bytes(session_data=st.session_state.dfs)
+        dfs = st.session_state.dfs
+        xlsx_bytes = _cached_workbook_bytes(tuple(df_hash(dfs[k]) for k in sorted(dfs)), dfs)
         st.session_state._excel_bytes = xlsx_bytes
         st.sidebar.success("Excel ready for download.")
     except Exception as e:
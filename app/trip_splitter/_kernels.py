@@ -0,0 +1,56 @@
+"""
+_kernels.py
+-----------
+Numeric inner loops used by logic.py.
+
+Compiled with numba when it is installed; otherwise the same functions run
+as plain Python over NumPy arrays.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; kernels then run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+
+@njit(cache=True)
+def _settle_kernel(net: np.ndarray, deb_order: np.ndarray, cred_order: np.ndarray, eps: int):
+    """
+    Greedy largest-debtor / largest-creditor matching over integer balances.
+
+    Returns (debtor_idx, creditor_idx, amount) arrays indexing into net.
+    """
+    bal = net.copy()
+    n = len(deb_order) + len(cred_order)
+    from_idx = np.empty(n, dtype=np.int64)
+    to_idx = np.empty(n, dtype=np.int64)
+    amount = np.empty(n, dtype=np.int64)
+
+    k, i, j = 0, 0, 0
+    while i < len(deb_order) and j < len(cred_order):
+        d = deb_order[i]
+        c = cred_order[j]
+
+        pay_amount = min(-bal[d], bal[c])
+        if pay_amount > eps:
+            from_idx[k] = d
+            to_idx[k] = c
+            amount[k] = pay_amount
+            k += 1
+
+            # Update balances
+            bal[d] += pay_amount
+            bal[c] -= pay_amount
+
+        # Move pointers if someone is settled
+        if abs(bal[d]) <= eps:
+            i += 1
+        if abs(bal[c]) <= eps:
+            j += 1
+
+    return from_idx[:k], to_idx[:k], amount[:k]
@@ -10,232 +10,296 @@ Steps:
 """
 
 import os
+import numpy as np
 import pandas as pd
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
-from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl.utils import get_column_letter
 from openpyxl.chart import PieChart, BarChart, Reference
 from io import BytesIO
 
 from trip_splitter.logic import (
-    load_all_data,
     convert_expenses_to_base,
     compute_allocations,
     compute_balances,
     compute_settlement,
+    compute_category_totals,
+    run_pipeline,
 )
 from trip_splitter.schemas import TRIP_NAME
 
 
 OUTPUT_FILE = "Trip_Splitter.xlsx"
 
+# Shared style objects (openpyxl copies them into each cell's style id)
+_BOLD = Font(bold=True)
+_TITLE = Font(bold=True, size=14)
 
-def auto_size_worksheet(ws, df, start_row: int = 1):
+VND_FORMAT = '#,##0" ₫"'
+CURRENCY_FORMATS = {
+    "VND": VND_FORMAT,
+    "CNY": '#,##0" ¥"',
+    "USD": '"$"#,##0',
+    "EUR": '#,##0" €"',
+}
+
+
+def auto_size_worksheet(ws, rows, start_row: int = 1):
     """
     Auto-size columns and rows for better printing and readability.
+
+    Write-only sheets can't be read back, so sizes are computed from the
+    buffered row values (list of lists, row 1 first) before they are appended.
     """
     # Auto-size columns based on content
-    for column in ws.columns:
+    n_cols = max((len(row) for row in rows), default=0)
+    for col_idx in range(n_cols):
         max_length = 0
-        column_letter = column[0].column_letter
-        
-        for cell in column:
+
+        for row in rows:
+            value = row[col_idx] if col_idx < len(row) else None
             try:
-                if cell.value:
+                if value:
                     # Calculate length based on content type
-                    if isinstance(cell.value, (int, float)):
+                    if isinstance(value, (int, float)):
                         # For numbers, use a reasonable width
-                        length = len(str(cell.value)) + 2
+                        length = len(str(value)) + 2
                     else:
                         # For text, use actual character count
-                        length = len(str(cell.value))
-                    
-                    # Add extra space for currency symbols and formatting
-                    if cell.number_format and ('"₫"' in str(cell.number_format) or '"¥"' in str(cell.number_format) or '"€"' in str(cell.number_format) or '"$"' in str(cell.number_format)):
-                        length += 3
-                    
+                        length = len(str(value))
+
                     max_length = max(max_length, length)
             except:
                 pass
-        
+
         # Set reasonable bounds for column width
         adjusted_width = min(max(max_length + 2, 10), 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
+        ws.column_dimensions[get_column_letter(col_idx + 1)].width = adjusted_width
+
     # Set row heights for better readability
-    for row in ws.iter_rows(min_row=start_row, max_row=ws.max_row):
-        ws.row_dimensions[row[0].row].height = 20
-    
+    for row_idx in range(start_row, len(rows) + 1):
+        ws.row_dimensions[row_idx].height = 20
+
     # Set header row height slightly larger
     if start_row > 1:
         ws.row_dimensions[start_row].height = 25
 
 
-def write_df_to_sheet(ws, df, title: str = None, bold_header: bool = True, freeze: bool = True):
-    """
-    Write a pandas DataFrame to an openpyxl worksheet.
+def frame_rows(df, title: str = None, bold_header: bool = True):
     """
-    if title:
-        ws["A1"] = title
-        ws["A1"].font = Font(bold=True, size=14)
-        start_row = 3
-    else:
-        start_row = 1
+    Lay out a DataFrame as sheet rows.
 
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), start=start_row):
-        ws.append(row)
-        if bold_header and r_idx == start_row:
-            for cell in ws[r_idx]:
-                cell.font = Font(bold=True)
+    With a title, A1 holds it, the header follows on row 2 and row 3 is a bold
+    spacer, so data starts on row 4 (where charts and formats expect it).
+    Without a title the header itself is row 1 and bold.
 
-    if freeze:
-        ws.freeze_panes = ws.cell(row=start_row + 1, column=1)
-    
-    # Auto-size columns and rows for better printing
-    auto_size_worksheet(ws, df, start_row)
-
-
-def format_currency_column(ws, col_idx: int, start_row: int = 4):
+    Returns
+    -------
+    tuple
+        (rows, bold_row, data_start): the value rows, the 1-based row to embolden
+        (or None) and the 1-based row of the first data record.
     """
-    Apply VND currency formatting to a column in a worksheet.
+    rows = [[title]] if title else []
+    header = list(df.columns)
+    data = list(df.itertuples(index=False, name=None))
+    rows.append(header)
+    bold_row = None
+    if bold_header:
+        if title:
+            rows.append([None] * len(header))
+        bold_row = 3 if title else 1
+    return rows + data, bold_row, len(rows) + 1
+
+
+def append_rows(ws, rows, bold_rows=(), title: bool = False, formats: dict = None, links: dict = None):
     """
-    VND_FORMAT = '#,##0" ₫"'
-    for row in ws.iter_rows(min_row=start_row, min_col=col_idx, max_col=col_idx):
-        for cell in row:
-            if isinstance(cell.value, (int, float)):
-                cell.number_format = VND_FORMAT
-
-def format_expenses_amount(ws, df, amount_col: str = "Amount", currency_col: str = "Currency", start_row: int = 4):
-    """
-    Apply per-row currency formatting for the 'Amount' column in Expenses sheet.
+    Stream rows into a write-only worksheet, styling cells as they are appended.
 
     Parameters
     ----------
-    ws : openpyxl worksheet
-    df : pandas DataFrame (expenses with Currency column)
-    amount_col : str, default 'Amount'
-        Name of the original amount column.
-    currency_col : str, default 'Currency'
-        Name of the currency column.
-    start_row : int, default=4
-        First row of data (after title and header).
+    rows : list of lists
+        Row values, row 1 first.
+    bold_rows : iterable of int
+        1-based rows whose cells are all bold.
+    title : bool
+        Whether A1 is a sheet title (bold, size 14).
+    formats : dict, optional
+        {1-based column: (first_row, fmt)} number formats for the rows from
+        first_row on; fmt is a string or a per-row sequence (None = General).
+    links : dict, optional
+        {(row, column): url} cells written as "🧾 receipt" hyperlinks.
+    """
+    bold_rows = set(bold_rows)
+    formats = formats or {}
+    # Group links by row so each row costs one dict lookup, not one per cell
+    row_links = {}
+    for (row_idx, col_idx), url in (links or {}).items():
+        row_links.setdefault(row_idx, {})[col_idx] = url
+
+    for row_idx, values in enumerate(rows, start=1):
+        bold = row_idx in bold_rows
+        is_title = title and row_idx == 1
+        urls = row_links.get(row_idx, {})
+        # Resolve this row's number formats once per formatted column
+        fmts = {}
+        for col_idx, (first_row, fmt) in formats.items():
+            if row_idx >= first_row:
+                fmt = fmt if isinstance(fmt, str) else fmt[row_idx - first_row]
+                if fmt is not None:
+                    fmts[col_idx] = fmt
+        if not (bold or is_title or urls or fmts):
+            ws.append(values)
+            continue
+
+        # Only styled cells become WriteOnlyCells; the rest stay plain values
+        cells = list(values)
+        styled = range(1, len(cells) + 1) if bold else sorted({*fmts, *urls, *([1] if is_title else [])})
+        for col_idx in styled:
+            url = urls.get(col_idx)
+            fmt = fmts.get(col_idx)
+            cell = WriteOnlyCell(ws, value="🧾 receipt" if url else cells[col_idx - 1])
+            if is_title and col_idx == 1:
+                cell.font = _TITLE
+            if bold:
+                cell.font = _BOLD
+            if fmt is not None:
+                cell.number_format = fmt
+            if url:
+                cell.hyperlink = url
+                cell.style = "Hyperlink"
+            cells[col_idx - 1] = cell
+        ws.append(cells)
+
+
+def write_df_to_sheet(ws, df, title: str = None, bold_header: bool = True, freeze: bool = True,
+                      formats: dict = None, links: dict = None):
     """
-    CURRENCY_FORMATS = {
-        "VND": '#,##0" ₫"',
-        "CNY": '#,##0" ¥"',
-        "USD": '"$"#,##0',
-        "EUR": '#,##0" €"',
-    }
+    Write a pandas DataFrame to a write-only openpyxl worksheet.
 
-    amount_idx = list(df.columns).index(amount_col) + 1
-    currency_idx = list(df.columns).index(currency_col) + 1
+    formats maps column names to a number format (string or per-row sequence)
+    for the data cells; links maps data row positions to receipt URLs in the
+    DriveURL column. Sizing and freeze panes are set before any row is streamed.
+    """
+    rows, bold_row, data_start = frame_rows(df, title, bold_header)
+    columns = list(df.columns)
+
+    # Auto-size columns and rows for better printing
+    auto_size_worksheet(ws, rows, 3 if title else 1)
+    if freeze:
+        ws.freeze_panes = f"A{(3 if title else 1) + 1}"
 
-    for row_offset, row in enumerate(ws.iter_rows(min_row=start_row, max_row=start_row + len(df) - 1), start=0):
-        amount_cell = row[amount_idx - 1]
-        currency_cell = row[currency_idx - 1]
+    col_formats = {columns.index(c) + 1: (data_start, fmt) for c, fmt in (formats or {}).items()}
+    cell_links = {}
+    if links:
+        url_col = columns.index("DriveURL") + 1
+        cell_links = {(data_start + pos, url_col): url for pos, url in links.items()}
+    append_rows(ws, rows, bold_rows=[bold_row] if bold_row else [], title=bool(title),
+                formats=col_formats, links=cell_links)
 
-        cur = currency_cell.value
-        if isinstance(amount_cell.value, (int, float)) and cur in CURRENCY_FORMATS:
-            amount_cell.number_format = CURRENCY_FORMATS[cur]
 
-def build_workbook(data_dir="sample_data", out_path=OUTPUT_FILE):
+def expenses_amount_formats(df, currency_col: str = "Currency") -> list:
     """
-    Run pipeline and build the Excel workbook.
+    Per-row number formats for the original 'Amount' column in the Expenses sheet,
+    with the proper currency symbol (None for currencies without a format).
     """
-    # Load raw CSVs
-    data = load_all_data(data_dir)
+    return [CURRENCY_FORMATS.get(cur) for cur in df[currency_col].to_numpy()]
 
-    # Pipeline
-    expenses_vnd = convert_expenses_to_base(data["expenses"], data["rates"])
-    allocations = compute_allocations(expenses_vnd, data["splits"], data["participants"])
-    balances = compute_balances(expenses_vnd, allocations, data["participants"])
-    settlement = compute_settlement(balances)
 
+def _assemble_workbook(expenses_vnd, allocations, balances, settlement) -> Workbook:
+    """
+    Build the populated workbook (sheets, hyperlinks, summary charts, formats)
+    from the pipeline results.
+
+    The workbook is write-only: each sheet is streamed once with its styles
+    attached at append time, instead of materializing every cell and
+    restyling it in place.
+    """
     # Create workbook
-    wb = Workbook()
+    wb = Workbook(write_only=True)
+    # The sheets hold only literal values (no formulas), so skip openpyxl's default
+    # forced full recalculation when the file is opened
+    wb.calculation.fullCalcOnLoad = False
 
     # Sheets in desired order
-    ws_settle = wb.active
-    ws_settle.title = "Settlement"
+    ws_settle = wb.create_sheet("Settlement")
     ws_summary = wb.create_sheet("Summary")
     ws_balances = wb.create_sheet("Balances")
     ws_allocs = wb.create_sheet("Allocations")
     ws_expenses = wb.create_sheet("Expenses")
 
-    # Write data
-    write_df_to_sheet(ws_settle, settlement, title=f"{TRIP_NAME} Settlement")
-    write_df_to_sheet(ws_balances, balances, title="Participant Balances")
-    write_df_to_sheet(ws_allocs, allocations, title="Allocations (per expense)")
-    write_df_to_sheet(ws_expenses, expenses_vnd, title="Expenses with VND Conversion")
-
-    # Add receipt hyperlinks
-    url_col = list(expenses_vnd.columns).index("DriveURL") + 1
-    for row_idx, url in enumerate(expenses_vnd["DriveURL"], start=4):
-        if pd.notna(url) and str(url).strip():
-            cell = ws_expenses.cell(row=row_idx, column=url_col)
-            cell.value = "🧾 receipt"
-            cell.hyperlink = url
-            cell.style = "Hyperlink"
+    # Write data, with VND formatting on the base-amount columns
+    settle_formats = {}
+    if not settlement.empty and "Amount_VND" in settlement.columns:
+        settle_formats["Amount_VND"] = VND_FORMAT
+    write_df_to_sheet(ws_settle, settlement, title=f"{TRIP_NAME} Settlement", formats=settle_formats)
+    write_df_to_sheet(ws_balances, balances, title="Participant Balances",
+                      formats={col: VND_FORMAT for col in ["Paid_Base", "Owed_Base", "Net_Base"]})
+    write_df_to_sheet(ws_allocs, allocations, title="Allocations (per expense)",
+                      formats={"Share_Base": VND_FORMAT})
+
+    # Receipt hyperlinks and the original Amount column with proper currency symbols
+    urls = expenses_vnd["DriveURL"]
+    has_url = (urls.notna() & urls.astype(str).str.strip().ne("")).to_numpy()
+    url_values = urls.to_numpy(dtype=object)
+    receipts = {pos: url_values[pos] for pos in np.flatnonzero(has_url)}
+    write_df_to_sheet(ws_expenses, expenses_vnd, title="Expenses with VND Conversion",
+                      formats={"Amount_Base": VND_FORMAT, "Amount": expenses_amount_formats(expenses_vnd)},
+                      links=receipts)
 
     # --- Summary content ---
-    totals_by_cat = expenses_vnd.groupby("Category")["Amount_Base"].sum().reset_index()
+    totals_by_cat = compute_category_totals(expenses_vnd)
     totals_by_person = balances[["Participant", "Paid_Base", "Owed_Base", "Net_Base"]]
 
-    write_df_to_sheet(ws_summary, totals_by_cat, title="Totals by Category")
-    start_row = ws_summary.max_row + 2
-    for r_idx, row in enumerate(dataframe_to_rows(totals_by_person, index=False, header=True), start=start_row):
-        ws_summary.append(row)
-        if r_idx == start_row:
-            for cell in ws_summary[r_idx]:
-                cell.font = Font(bold=True)
-    
+    rows, bold_row, _ = frame_rows(totals_by_cat, title="Totals by Category")
+    auto_size_worksheet(ws_summary, rows, start_row=3)
+    ws_summary.freeze_panes = "A4"
+
+    # The person table follows directly; the row after its header is the bold
+    # spacer the charts take their series titles from
+    start_row = len(rows) + 2
+    person_header = list(totals_by_person.columns)
+    person_rows = list(totals_by_person.itertuples(index=False, name=None))
+    n_cols = max(max(len(row) for row in rows), len(person_header))
+    rows += [person_header, [None] * n_cols] + person_rows
+
     # Auto-size the summary sheet
-    auto_size_worksheet(ws_summary, totals_by_person, start_row=start_row)
+    auto_size_worksheet(ws_summary, rows, start_row=start_row)
 
     # Charts
     pie = PieChart()
     labels = Reference(ws_summary, min_col=1, min_row=4, max_row=3 + len(totals_by_cat))
-    data = Reference(ws_summary, min_col=2, min_row=3, max_row=3 + len(totals_by_cat))
-    pie.add_data(data, titles_from_data=True)
+    chart_data = Reference(ws_summary, min_col=2, min_row=3, max_row=3 + len(totals_by_cat))
+    pie.add_data(chart_data, titles_from_data=True)
     pie.set_categories(labels)
     pie.title = "Spending by Category"
     ws_summary.add_chart(pie, "D4")
 
     bar = BarChart()
     labels = Reference(ws_summary, min_col=1, min_row=start_row + 1, max_row=start_row + len(totals_by_person))
-    data = Reference(ws_summary, min_col=2, min_row=start_row, max_col=4, max_row=start_row + len(totals_by_person))
-    bar.add_data(data, titles_from_data=True)
+    chart_data = Reference(ws_summary, min_col=2, min_row=start_row, max_col=4, max_row=start_row + len(totals_by_person))
+    bar.add_data(chart_data, titles_from_data=True)
     bar.set_categories(labels)
     bar.title = "Paid vs Owed vs Net"
     ws_summary.add_chart(bar, "D15")
 
-    # Reorder sheets
-    wb._sheets = [ws_settle, ws_summary, ws_balances, ws_allocs, ws_expenses]
+    append_rows(ws_summary, rows, bold_rows=[bold_row, start_row], title=True)
+
+    return wb
 
-    # Apply formatting
-    if not settlement.empty and "Amount_VND" in settlement.columns:
-        amt_col = list(settlement.columns).index("Amount_VND") + 1
-        format_currency_column(ws_settle, amt_col)
-    for col in ["Paid_Base", "Owed_Base", "Net_Base"]:
-        col_idx = list(balances.columns).index(col) + 1
-        format_currency_column(ws_balances, col_idx)
-    col_idx = list(allocations.columns).index("Share_Base") + 1
-    format_currency_column(ws_allocs, col_idx)
-    col_idx = list(expenses_vnd.columns).index("Amount_Base") + 1
-    format_currency_column(ws_expenses, col_idx)
-    
-    # Original Amount column formatting with proper currency symbols
-    format_expenses_amount(ws_expenses, expenses_vnd, amount_col="Amount", currency_col="Currency")
+
+def build_workbook(data_dir="sample_data", out_path=OUTPUT_FILE):
+    """
+    Run pipeline and build the Excel workbook.
+    """
+    # Load raw CSVs and run the pipeline (memoized per data_dir contents)
+    wb = _assemble_workbook(*run_pipeline(data_dir))
 
     # Save
     wb.save(out_path)
     print(f"Workbook saved to {os.path.abspath(out_path)}")
 
 
-if __name__ == "__main__":
-    build_workbook()
-
-
 def build_workbook_bytes(data_dir="sample_data", session_data=None) -> bytes:
     """
     Build the workbook and return it as bytes for GUI download.
@@ -251,93 +315,38 @@ def build_workbook_bytes(data_dir="sample_data", session_data=None) -> bytes:
     if session_data is not None:
         # Use session data (current edits)
         data = session_data
+        expenses_vnd = convert_expenses_to_base(data["expenses"], data["rates"])
+        allocations = compute_allocations(expenses_vnd, data["splits"], data["participants"])
+        balances = compute_balances(expenses_vnd, allocations, data["participants"])
+        settlement = compute_settlement(balances)
     else:
-        # Load raw CSVs from disk
-        data = load_all_data(data_dir)
-
-    # Pipeline
-    expenses_vnd = convert_expenses_to_base(data["expenses"], data["rates"])
-    allocations = compute_allocations(expenses_vnd, data["splits"], data["participants"])
-    balances = compute_balances(expenses_vnd, allocations, data["participants"])
-    settlement = compute_settlement(balances)
-
-    # Create workbook
-    wb = Workbook()
-
-    # Sheets in desired order
-    ws_settle = wb.active
-    ws_settle.title = "Settlement"
-    ws_summary = wb.create_sheet("Summary")
-    ws_balances = wb.create_sheet("Balances")
-    ws_allocs = wb.create_sheet("Allocations")
-    ws_expenses = wb.create_sheet("Expenses")
+        # Load raw CSVs from disk and run the pipeline (shared with build_workbook)
+        expenses_vnd, allocations, balances, settlement = run_pipeline(data_dir)
 
-    # Write data
-    write_df_to_sheet(ws_settle, settlement, title=f"{TRIP_NAME} Settlement")
-    write_df_to_sheet(ws_balances, balances, title="Participant Balances")
-    write_df_to_sheet(ws_allocs, allocations, title="Allocations (per expense)")
-    write_df_to_sheet(ws_expenses, expenses_vnd, title="Expenses with VND Conversion")
-
-    # Add receipt hyperlinks
-    url_col = list(expenses_vnd.columns).index("DriveURL") + 1
-    for row_idx, url in enumerate(expenses_vnd["DriveURL"], start=4):
-        if pd.notna(url) and str(url).strip():
-            cell = ws_expenses.cell(row=row_idx, column=url_col)
-            cell.value = "🧾 receipt"
-            cell.hyperlink = url
-            cell.style = "Hyperlink"
+    wb = _assemble_workbook(expenses_vnd, allocations, balances, settlement)
 
-    # --- Summary content ---
-    totals_by_cat = expenses_vnd.groupby("Category")["Amount_Base"].sum().reset_index()
-    totals_by_person = balances[["Participant", "Paid_Base", "Owed_Base", "Net_Base"]]
+    # Save to bytes
+    bio = BytesIO()
+    wb.save(bio)
+    return bio.getvalue()
 
-    write_df_to_sheet(ws_summary, totals_by_cat, title="Totals by Category")
-    start_row = ws_summary.max_row + 2
-    for r_idx, row in enumerate(dataframe_to_rows(totals_by_person, index=False, header=True), start=start_row):
-        ws_summary.append(row)
-        if r_idx == start_row:
-            for cell in ws_summary[r_idx]:
-                cell.font = Font(bold=True)
-    
-    # Auto-size the summary sheet
-    auto_size_worksheet(ws_summary, totals_by_person, start_row=start_row)
 
-    # Charts
-    pie = PieChart()
-    labels = Reference(ws_summary, min_col=1, min_row=4, max_row=3 + len(totals_by_cat))
-    chart_data = Reference(ws_summary, min_col=2, min_row=3, max_row=3 + len(totals_by_cat))
-    pie.add_data(chart_data, titles_from_data=True)
-    pie.set_categories(labels)
-    pie.title = "Spending by Category"
-    ws_summary.add_chart(pie, "D4")
-
-    bar = BarChart()
-    labels = Reference(ws_summary, min_col=1, min_row=start_row + 1, max_row=start_row + len(totals_by_person))
-    chart_data = Reference(ws_summary, min_col=2, min_row=start_row, max_col=4, max_row=start_row + len(totals_by_person))
-    bar.add_data(chart_data, titles_from_data=True)
-    bar.set_categories(labels)
-    bar.title = "Paid vs Owed vs Net"
-    ws_summary.add_chart(bar, "D15")
+def build_workbook_bytes_from_dfs(participants, rates, expenses, splits) -> bytes:
+    """
+    Build the workbook bytes from in-memory DataFrames (no CSV reads).
 
-    # Reorder sheets
-    wb._sheets = [ws_settle, ws_summary, ws_balances, ws_allocs, ws_expenses]
+    Parameters
+    ----------
+    participants, rates, expenses, splits : pd.DataFrame
+        Current session frames, as returned by load_all_data
+    """
+    return build_workbook_bytes(session_data={
+        "participants": participants,
+        "rates": rates,
+        "expenses": expenses,
+        "splits": splits,
+    })
 
-    # Apply formatting
-    if not settlement.empty and "Amount_VND" in settlement.columns:
-        amt_col = list(settlement.columns).index("Amount_VND") + 1
-        format_currency_column(ws_settle, amt_col)
-    for col in ["Paid_Base", "Owed_Base", "Net_Base"]:
-        col_idx = list(balances.columns).index(col) + 1
-        format_currency_column(ws_balances, col_idx)
-    col_idx = list(allocations.columns).index("Share_Base") + 1
-    format_currency_column(ws_allocs, col_idx)
-    col_idx = list(expenses_vnd.columns).index("Amount_Base") + 1
-    format_currency_column(ws_expenses, col_idx)
-
-    # Original Amount column formatting with proper currency symbols
-    format_expenses_amount(ws_expenses, expenses_vnd, amount_col="Amount", currency_col="Currency")
 
-    # Save to bytes
-    bio = BytesIO()
-    wb.save(bio)
-    return bio.getvalue()
\ No newline at end of file
+if __name__ == "__main__":
+    build_workbook()
@@ -8,9 +8,18 @@ Functions for loading and validating trip expense data from CSVs.
 - Provides helper to load all data at once.
 """
 
+import functools
 import os
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"  # multi-threaded Arrow CSV reader
+except ImportError:  # pyarrow is optional; fall back to pandas' C parser
+    CSV_ENGINE = "c"
+
+from trip_splitter._kernels import _settle_kernel
 from trip_splitter.schemas import (
     PARTICIPANTS_SCHEMA,
     RATES_SCHEMA,
@@ -26,16 +35,33 @@ from trip_splitter.schemas import (
 # Loader functions
 # -----------------------------
 
+# datetime64 dtype the C engine's parse_dates yields on this pandas version
+_DATE_DTYPE = pd.to_datetime(pd.Series(["2000-01-01"])).dtype
+
+
+def _read_csv(path: str, date_cols=()) -> pd.DataFrame:
+    """
+    read_csv with CSV_ENGINE. Parsed date columns are normalized to the C
+    engine's datetime unit, which the Arrow reader does not always match.
+    """
+    kwargs = {"parse_dates": list(date_cols)} if date_cols else {}
+    df = pd.read_csv(path, engine=CSV_ENGINE, **kwargs)
+    for col in date_cols:
+        if pd.api.types.is_datetime64_dtype(df[col]):
+            df[col] = df[col].astype(_DATE_DTYPE)
+    return df
+
+
 def load_participants(path: str) -> pd.DataFrame:
     """Load participants.csv"""
-    df = pd.read_csv(path)
+    df = _read_csv(path)
     validate_columns(df, PARTICIPANTS_SCHEMA)
     return df
 
 
 def load_rates(path: str) -> pd.DataFrame:
     """Load rates.csv (parse Date)"""
-    df = pd.read_csv(path, parse_dates=["Date"])
+    df = _read_csv(path, date_cols=["Date"])
     validate_columns(df, RATES_SCHEMA)
     # Ensure VND always = 1
     vnd_rows = df[df["Currency"] == "VND"]
@@ -46,13 +72,14 @@ def load_rates(path: str) -> pd.DataFrame:
 
 def load_expenses(path: str) -> pd.DataFrame:
     """Load expenses.csv (parse Date, validate categories/currencies)"""
-    df = pd.read_csv(path, parse_dates=["Date"])
+    df = _read_csv(path, date_cols=["Date"])
     validate_columns(df, EXPENSES_SCHEMA)
 
-    # Validate categories and currencies
-    for cat in df["Category"]:
+    # Validate categories and currencies (once per distinct value, in order of
+    # appearance, so the first bad value is still the one reported)
+    for cat in df["Category"].unique():
         validate_category(cat)
-    for cur in df["Currency"]:
+    for cur in df["Currency"].unique():
         validate_currency(cur)
 
     return df
@@ -60,7 +87,7 @@ def load_expenses(path: str) -> pd.DataFrame:
 
 def load_splits(path: str) -> pd.DataFrame:
     """Load splits.csv"""
-    df = pd.read_csv(path)
+    df = _read_csv(path)
     validate_columns(df, SPLITS_SCHEMA)
 
     # Normalize Included column to boolean
@@ -73,10 +100,45 @@ def load_splits(path: str) -> pd.DataFrame:
 # High-level loader
 # -----------------------------
 
+DATA_FILES = ("participants.csv", "rates.csv", "expenses.csv", "splits.csv")
+
+
+def data_dir_signature(data_dir: str) -> tuple:
+    """
+    (file, mtime_ns, size) per CSV in data_dir.
+
+    Changes whenever any CSV is rewritten on disk (size catches rewrites within
+    a coarse mtime tick). A missing file contributes (file, None, None); the
+    loader then raises the usual FileNotFoundError.
+    """
+    sig = []
+    for name in DATA_FILES:
+        try:
+            st = os.stat(os.path.join(data_dir, name))
+            sig.append((name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((name, None, None))
+    return tuple(sig)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_cached(data_dir: str, sig: tuple) -> dict:
+    # sig is only part of the cache key; it invalidates stale entries
+    return {
+        "participants": load_participants(os.path.join(data_dir, "participants.csv")),
+        "rates": load_rates(os.path.join(data_dir, "rates.csv")),
+        "expenses": load_expenses(os.path.join(data_dir, "expenses.csv")),
+        "splits": load_splits(os.path.join(data_dir, "splits.csv")),
+    }
+
+
 def load_all_data(data_dir: str = "sample_data"):
     """
     Load all CSVs into a dictionary of DataFrames.
 
+    Results are memoized on the files' mtime and size, so repeated loads of
+    an unchanged directory skip parsing and validation.
+
     Parameters
     ----------
     data_dir : str
@@ -92,17 +154,10 @@ def load_all_data(data_dir: str = "sample_data"):
             "splits": DataFrame,
         }
     """
-    participants = load_participants(os.path.join(data_dir, "participants.csv"))
-    rates = load_rates(os.path.join(data_dir, "rates.csv"))
-    expenses = load_expenses(os.path.join(data_dir, "expenses.csv"))
-    splits = load_splits(os.path.join(data_dir, "splits.csv"))
-
-    return {
-        "participants": participants,
-        "rates": rates,
-        "expenses": expenses,
-        "splits": splits,
-    }
+    data = _load_cached(os.path.abspath(data_dir), data_dir_signature(data_dir))
+    # Deep copies: without Copy-on-Write (pandas < 3) an in-place edit of a
+    # shallow copy would write through into the cached frames
+    return {k: df.copy() for k, df in data.items()}
     
 # -----------------------------
 # FX Conversion
@@ -124,14 +179,63 @@ def convert_expenses_to_base(expenses: pd.DataFrame, rates: pd.DataFrame, base="
     """
     Add Amount_Base (in VND) column to expenses DataFrame.
     """
-    expenses = expenses.copy()
-    expenses["Amount_Base"] = expenses.apply(
-        lambda row: row["Amount"] * get_rate_on_or_before(rates, row["Date"], row["Currency"], base),
-        axis=1,
-    )
-    # Round to whole VND
-    expenses["Amount_Base"] = expenses["Amount_Base"].round(0).astype(int)
-    return expenses
+    currency = expenses["Currency"].astype(object)
+    dates = pd.to_datetime(expenses["Date"]).astype("datetime64[ns]")
+
+    # Base-currency rows convert at 1.0; everything else is looked up below
+    rate = np.ones(len(expenses))
+    need = (currency != base).to_numpy()
+    rate[need] = np.nan
+
+    if need.any():
+        # Latest rate on or before each expense date, per currency, in one
+        # merge_asof instead of a filter + sort per row
+        left = pd.DataFrame({
+            "_row": np.flatnonzero(need),
+            "Date": dates[need].to_numpy(),
+            "Currency": currency[need].to_numpy(),
+        }).dropna(subset=["Date"])
+        right = pd.DataFrame({
+            "Date": pd.to_datetime(rates["Date"]).astype("datetime64[ns]").to_numpy(),
+            "Currency": rates["Currency"].astype(object).to_numpy(),
+            "Rate_to_Base": rates["Rate_to_Base"].to_numpy(dtype=float),
+        }).dropna(subset=["Date"])
+        matched = pd.merge_asof(
+            left.sort_values("Date", kind="stable"),
+            right.sort_values("Date", kind="stable"),
+            on="Date",
+            by="Currency",
+            direction="backward",
+        )
+        rate[matched["_row"].to_numpy()] = matched["Rate_to_Base"].to_numpy()
+
+    missing = np.flatnonzero(np.isnan(rate))
+    if len(missing):
+        i = missing[0]
+        raise ValueError(
+            f"No FX rate found for {expenses['Currency'].iloc[i]} on or before {expenses['Date'].iloc[i]}"
+        )
+
+    # assign returns a new frame, so the input is untouched without copying it up front
+    amount_base = _to_whole_base(expenses["Amount"].to_numpy(dtype=float), rate)
+    return expenses.assign(Amount_Base=pd.Series(amount_base, index=expenses.index))
+
+
+def _to_whole_base(amount: np.ndarray, rate: np.ndarray) -> np.ndarray:
+    """
+    amount * rate rounded (half to even) to whole VND, as int64.
+
+    Float multiply + round like the original row-by-row conversion; Amount
+    is a float column, so exact decimal arithmetic would move some products
+    near half a VND by 1. Raises IntCastingNaNError on any NaN/inf product, as pandas'
+    astype(int) did.
+    """
+    product = amount * rate
+    if not np.isfinite(product).all():
+        raise pd.errors.IntCastingNaNError(
+            "Cannot convert non-finite values (NA or inf) to integer"
+        )
+    return product.round(0).astype(np.int64)
 
 
 # -----------------------------
@@ -142,31 +246,45 @@ def compute_allocations(expenses: pd.DataFrame, splits: pd.DataFrame, participan
     """
     Compute per-participant share of each expense in VND.
     """
-    # Merge splits with participant default weights
-    p_weights = participants.set_index("Name")["DefaultWeight"].to_dict()
-    s = splits.copy()
-
-    # Resolve UseWeight
-    def resolve_weight(row):
-        if not row["Included"]:
-            return 0.0
-        if row["WeightOverride"] and str(row["WeightOverride"]).strip() != "":
-            return float(row["WeightOverride"])
-        return float(p_weights.get(row["Participant"], 1.0))
-
-    s["UseWeight"] = s.apply(resolve_weight, axis=1)
-
-    # Merge in Amount_Base for each ExpID
-    exp_base = expenses.set_index("ExpID")["Amount_Base"]
-    s = s.join(exp_base, on="ExpID")
+    # Default weight per split row: Participant as positional codes into the
+    # participant names, used to index the DefaultWeight array directly
+    # (unique, non-null names; last row wins like a dict would)
+    names = participants["Name"]
+    keep = (names.notna() & ~names.duplicated(keep="last")).to_numpy()
+    weights = participants["DefaultWeight"].to_numpy(dtype=np.float64)[keep]
+    codes = pd.Index(names.to_numpy()[keep]).get_indexer(splits["Participant"])
+    # Unknown participants (code -1) pick up the trailing 1.0; a known
+    # participant's NaN weight propagates and fails the int cast below
+    default = np.append(weights, 1.0)[codes]
+
+    # Resolve UseWeight: 0 if excluded, else the override if given, else the default weight.
+    # Falsy overrides (numeric 0, False, empty) count as not given; the text "0" is a weight of 0
+    raw = splits["WeightOverride"]
+    blank = raw.isna() | ~raw.astype(bool) | raw.astype(str).str.strip().eq("")
+    override = pd.to_numeric(raw.where(~blank), errors="coerce")
+    invalid = ~blank & override.isna()
+    if invalid.any():
+        raise ValueError(f"Invalid WeightOverride: {raw[invalid].iloc[0]!r}")
+    override = override.to_numpy(dtype=float)
+    included = splits["Included"].fillna(True).astype(bool).to_numpy()
+    use_weight = pd.Series(np.where(included, np.where(np.isnan(override), default, override), 0.0), index=splits.index)
+
+    # Look up Amount_Base for each ExpID (hash map, no join/alignment)
+    exp_base = dict(zip(expenses["ExpID"].to_numpy(), expenses["Amount_Base"].to_numpy()))
+    amount_base = splits["ExpID"].map(exp_base)
 
     # Compute weight sums per expense
-    weight_sums = s.groupby("ExpID")["UseWeight"].transform("sum")
-    s["Share_Base"] = (s["Amount_Base"] * s["UseWeight"] / weight_sums).round(0).astype(int)
-
-    # Keep only participants who were included
-    allocs = s[s["UseWeight"] > 0].copy()
-    return allocs[["ExpID", "Participant", "Share_Base"]]
+    weight_sums = use_weight.groupby(splits["ExpID"]).transform("sum")
+    share_base = (amount_base * use_weight / weight_sums).round(0).astype(int)
+
+    # Keep only participants who were included; the result is built from the
+    # selected columns instead of copying the whole splits frame
+    selected = (use_weight > 0).to_numpy()
+    return pd.DataFrame({
+        "ExpID": splits["ExpID"][selected],
+        "Participant": splits["Participant"][selected],
+        "Share_Base": share_base[selected],
+    })
 
 # -----------------------------
 # Balances
@@ -190,17 +308,33 @@ def compute_balances(expenses: pd.DataFrame, allocations: pd.DataFrame, particip
     df = df.rename(columns={"Name": "Participant"})
     df = df.join(paid, on="Participant").join(owed, on="Participant")
 
-    # Fill missing values with 0
+    # Fill missing values with 0; sums of whole-VND amounts are already integral,
+    # the joins only turn them into floats where a participant has no rows
     df = df.fillna(0)
+    df[["Paid_Base", "Owed_Base"]] = df[["Paid_Base", "Owed_Base"]].astype(np.int64)
 
-    # Compute net
+    # Compute net (stays int64)
     df["Net_Base"] = df["Paid_Base"] - df["Owed_Base"]
 
-    # Round to whole VND (already integers but for safety)
-    df[["Paid_Base", "Owed_Base", "Net_Base"]] = df[["Paid_Base", "Owed_Base", "Net_Base"]].round(0).astype(int)
-
     return df
 
+# -----------------------------
+# Summary
+# -----------------------------
+
+def compute_category_totals(expenses: pd.DataFrame) -> pd.DataFrame:
+    """
+    Total Amount_Base (VND) per expense category.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns: ["Category", "Amount_Base"], sorted alphabetically by
+        category label whether Category is plain text or categorical.
+    """
+    totals = expenses.groupby("Category", observed=True, sort=False)["Amount_Base"].sum().reset_index()
+    return totals.sort_values("Category", key=lambda s: s.astype(str), ignore_index=True)
+
 # -----------------------------
 # Settlement
 # -----------------------------
@@ -221,35 +355,48 @@ def compute_settlement(balances: pd.DataFrame, eps: int = 1) -> pd.DataFrame:
     pd.DataFrame
         Columns: ["From (Payer)", "To (Receiver)", "Amount_VND"]
     """
-    creditors = balances[balances["Net_Base"] > 0].copy()
-    debtors = balances[balances["Net_Base"] < 0].copy()
+    net = balances["Net_Base"].to_numpy(dtype=np.int64)
+    names = balances["Participant"].to_numpy(dtype=object)
+
+    # Largest creditors first, largest debtors (most negative) first
+    cred_order = np.flatnonzero(net > 0)
+    cred_order = cred_order[np.argsort(-net[cred_order], kind="stable")]
+    deb_order = np.flatnonzero(net < 0)
+    deb_order = deb_order[np.argsort(net[deb_order], kind="stable")]
+
+    from_idx, to_idx, amount = _settle_kernel(net, deb_order, cred_order, eps)
+
+    return pd.DataFrame({
+        "From (Payer)": names[from_idx],
+        "To (Receiver)": names[to_idx],
+        "Amount_VND": amount,
+    })
 
-    creditors = creditors.sort_values("Net_Base", ascending=False).reset_index(drop=True)
-    debtors = debtors.sort_values("Net_Base", ascending=True).reset_index(drop=True)
 
-    txns = []
-    i, j = 0, 0
+# -----------------------------
+# Pipeline
+# -----------------------------
 
-    while i < len(debtors) and j < len(creditors):
-        debtor = debtors.loc[i]
-        creditor = creditors.loc[j]
+@functools.lru_cache(maxsize=8)
+def _run_pipeline_cached(data_dir: str, sig: tuple) -> tuple:
+    data = _load_cached(data_dir, sig)
+    expenses_vnd = convert_expenses_to_base(data["expenses"], data["rates"])
+    allocations = compute_allocations(expenses_vnd, data["splits"], data["participants"])
+    balances = compute_balances(expenses_vnd, allocations, data["participants"])
+    settlement = compute_settlement(balances)
+    return expenses_vnd, allocations, balances, settlement
 
-        pay_amount = min(-debtor["Net_Base"], creditor["Net_Base"])
-        if pay_amount > eps:
-            txns.append({
-                "From (Payer)": debtor["Participant"],
-                "To (Receiver)": creditor["Participant"],
-                "Amount_VND": int(round(pay_amount, 0))
-            })
 
-            # Update balances
-            debtors.at[i, "Net_Base"] += pay_amount
-            creditors.at[j, "Net_Base"] -= pay_amount
+def run_pipeline(data_dir: str = "sample_data") -> tuple:
+    """
+    Load the CSVs in data_dir and run the full settlement pipeline.
 
-        # Move pointers if someone is settled
-        if abs(debtors.at[i, "Net_Base"]) <= eps:
-            i += 1
-        if abs(creditors.at[j, "Net_Base"]) <= eps:
-            j += 1
+    Memoized on the files' mtime and size, like load_all_data.
 
-    return pd.DataFrame(txns)
\ No newline at end of file
+    Returns
+    -------
+    tuple
+        (expenses_vnd, allocations, balances, settlement) DataFrames
+    """
+    results = _run_pipeline_cached(os.path.abspath(data_dir), data_dir_signature(data_dir))
+    return tuple(df.copy() for df in results)
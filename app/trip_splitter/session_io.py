@@ -0,0 +1,85 @@
+"""
+session_io.py
+-------------
+Reading and writing of GUI session data: saved session snapshots (session
+JSON files) and the edited tables written back as CSVs.
+"""
+
+import json
+from typing import Optional
+
+import pandas as pd
+
+try:
+    import orjson  # optional; parses straight from a buffer/mmap
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:  # optional; write_csv falls back to pandas' to_csv
+    pa = None
+
+
+def parse_session_json(data) -> dict:
+    """
+    Parse a session snapshot from bytes, a memoryview or an mmap.
+
+    orjson parses the buffer in place when installed. It rejects the bare
+    NaN tokens that older snapshots (written with json.dumps) contain, so
+    those are re-parsed with the stdlib json module, which needs one bytes
+    copy (no separate decode step).
+    """
+    if orjson is not None:
+        with memoryview(data) as buf:
+            try:
+                return orjson.loads(buf)
+            except orjson.JSONDecodeError:
+                pass
+    return json.loads(bytes(data))
+
+
+def write_csv(df: pd.DataFrame, path: str):
+    """
+    Write df to path as CSV, without the index; nulls become empty fields.
+
+    Uses Arrow's C++ CSV writer when pyarrow is installed and every column
+    can be written with the same text pandas' to_csv would produce (booleans
+    aside, which come out as true/false like the sample files). Anything
+    else is written by pandas.
+    """
+    if pa is not None:
+        try:
+            table = _csv_table(df)
+            if table is not None:
+                with open(path, "wb") as f:
+                    # write_csv always quotes header names, so the header is written by hand
+                    f.write((",".join(map(str, table.column_names)) + "\n").encode("utf-8"))
+                    pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(include_header=False, quoting_style="none"))
+                return
+        except (pa.ArrowException, TypeError, ValueError):
+            # Mixed-type columns or values needing quotes (commas, newlines)
+            pass
+    # na_rep avoids a filled copy of the frame
+    df.to_csv(path, index=False, na_rep="", lineterminator="\n")
+
+
+def _csv_table(df: pd.DataFrame) -> Optional["pa.Table"]:
+    # Arrow table whose CSV text matches pandas', or None to leave df to pandas
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type):
+            # Arrow writes 1.0 as "1"; keep pandas' repr so whole floats reload as floats
+            col = df.iloc[:, i]
+            table = table.set_column(i, field.name, pa.array(col.astype(str).where(col.notna()), type=pa.string()))
+        elif pa.types.is_timestamp(field.type):
+            # Midnight-only timestamps are written as plain dates, like pandas
+            # does; Arrow would give times of day a .000000 suffix
+            col = table.column(i)
+            as_date = col.cast(pa.date32())
+            if field.type.tz is not None or pc.all(pc.equal(as_date.cast(field.type), col)).as_py() is False:
+                return None
+            table = table.set_column(i, field.name, as_date)
+    return table
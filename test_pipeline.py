@@ -0,0 +1,180 @@
+# test_pipeline.py
+"""
+Assertion tests for the settlement pipeline stages.
+"""
+
+import pandas as pd
+import pytest
+
+from trip_splitter.logic import (
+    compute_allocations,
+    compute_balances,
+    compute_category_totals,
+    compute_settlement,
+    convert_expenses_to_base,
+    load_all_data,
+    run_pipeline,
+)
+
+# Known-good sample_data results, from the original row-by-row implementation
+SAMPLE_AMOUNT_BASE = {
+    "E0001": 700000, "E0002": 143944, "E0003": 2878880, "E0004": 68184,
+    "E0005": 189400, "E0006": 622747, "E0007": 261717, "E0008": 591708,
+    "E0009": 113790, "E0010": 83446, "E0011": 168030, "E0012": 94825,
+    "E0013": 439988, "E0014": 512055, "E0015": 709291, "E0016": 527227,
+    "E0017": 1019672, "E0018": 568950, "E0019": 242752, "E0020": 356542,
+    "E0021": 114169, "E0022": 371714, "E0023": 746083,
+}
+SAMPLE_BALANCES = pd.DataFrame({
+    "Participant": ["Chi Quynh", "Chi Tam", "Chi Vy", "Duc Huy"],
+    "Paid_Base": [2878880, 0, 0, 8646234],
+    "Owed_Base": [3895255, 1269804, 1641518, 4718546],
+    "Net_Base": [-1016375, -1269804, -1641518, 3927688],
+})
+SAMPLE_SETTLEMENT = pd.DataFrame({
+    "From (Payer)": ["Chi Vy", "Chi Tam", "Chi Quynh"],
+    "To (Receiver)": ["Duc Huy"] * 3,
+    "Amount_VND": [1641518, 1269804, 1016366],
+})
+
+
+@pytest.fixture
+def sample():
+    return load_all_data("sample_data")
+
+
+def reference_allocations(expenses, splits, participants):
+    # Original apply/join implementation, kept as the oracle
+    p_weights = participants.set_index("Name")["DefaultWeight"].to_dict()
+    s = splits.copy()
+
+    def resolve_weight(row):
+        if not row["Included"]:
+            return 0.0
+        if row["WeightOverride"] and str(row["WeightOverride"]).strip() != "":
+            return float(row["WeightOverride"])
+        return float(p_weights.get(row["Participant"], 1.0))
+
+    s["UseWeight"] = s.apply(resolve_weight, axis=1)
+    s = s.join(expenses.set_index("ExpID")["Amount_Base"], on="ExpID")
+    weight_sums = s.groupby("ExpID")["UseWeight"].transform("sum")
+    s["Share_Base"] = (s["Amount_Base"] * s["UseWeight"] / weight_sums).round(0).astype(int)
+    return s[s["UseWeight"] > 0][["ExpID", "Participant", "Share_Base"]]
+
+
+def shares(allocs: pd.DataFrame) -> dict:
+    return dict(zip(allocs["Participant"], allocs["Share_Base"]))
+
+
+def test_sample_amount_base(sample):
+    expenses = convert_expenses_to_base(sample["expenses"], sample["rates"])
+    assert dict(zip(expenses["ExpID"], expenses["Amount_Base"])) == SAMPLE_AMOUNT_BASE
+
+
+def test_sample_allocations_match_reference(sample):
+    expenses = convert_expenses_to_base(sample["expenses"], sample["rates"])
+    allocs = compute_allocations(expenses, sample["splits"], sample["participants"])
+    expected = reference_allocations(expenses, sample["splits"], sample["participants"])
+    pd.testing.assert_frame_equal(allocs, expected, check_dtype=False)
+
+
+def test_sample_balances_and_settlement(sample):
+    expenses = convert_expenses_to_base(sample["expenses"], sample["rates"])
+    allocs = compute_allocations(expenses, sample["splits"], sample["participants"])
+    balances = compute_balances(expenses, allocs, sample["participants"])
+    pd.testing.assert_frame_equal(balances, SAMPLE_BALANCES, check_dtype=False)
+    settlement = compute_settlement(balances)
+    pd.testing.assert_frame_equal(settlement, SAMPLE_SETTLEMENT, check_dtype=False)
+
+
+def test_sample_category_totals(sample):
+    expenses = convert_expenses_to_base(sample["expenses"], sample["rates"])
+    totals = compute_category_totals(expenses)
+    assert list(zip(totals["Category"].astype(str), totals["Amount_Base"])) == [
+        ("Food&Drinks", 4884411),
+        ("Gifts&Merch", 1918613),
+        ("Services", 700000),
+        ("Tickets", 2878880),
+        ("Travelling", 1143210),
+    ]
+
+
+def test_run_pipeline_matches_stages():
+    _, _, balances, settlement = run_pipeline("sample_data")
+    pd.testing.assert_frame_equal(balances, SAMPLE_BALANCES, check_dtype=False)
+    pd.testing.assert_frame_equal(settlement, SAMPLE_SETTLEMENT, check_dtype=False)
+
+
+def test_missing_rate_raises():
+    expenses = pd.DataFrame({"Date": ["2024-01-01"], "Currency": ["USD"], "Amount": [10.0]})
+    rates = pd.DataFrame({"Date": ["2024-01-02"], "Currency": ["USD"], "Rate_to_Base": [25000.0]})
+    with pytest.raises(ValueError, match="No FX rate found for USD"):
+        convert_expenses_to_base(expenses, rates)
+
+
+def test_nan_default_weight_raises(sample):
+    expenses = convert_expenses_to_base(sample["expenses"], sample["rates"])
+    participants = sample["participants"].copy()
+    participants["DefaultWeight"] = participants["DefaultWeight"].astype(float)
+    participants.loc[1, "DefaultWeight"] = float("nan")
+    with pytest.raises(pd.errors.IntCastingNaNError):
+        compute_allocations(expenses, sample["splits"], participants)
+
+
+def test_unknown_participant_gets_weight_one():
+    expenses = pd.DataFrame({"ExpID": ["E1"], "Amount_Base": [900]})
+    participants = pd.DataFrame({"Name": ["A"], "DefaultWeight": [2]})
+    splits = pd.DataFrame({
+        "ExpID": ["E1", "E1"],
+        "Participant": ["A", "X"],
+        "Included": [True, True],
+        "WeightOverride": ["", ""],
+    })
+    assert shares(compute_allocations(expenses, splits, participants)) == {"A": 600, "X": 300}
+
+
+def test_weight_override_semantics():
+    expenses = pd.DataFrame({"ExpID": ["E1"], "Amount_Base": [900]})
+    participants = pd.DataFrame({"Name": ["A", "B", "C", "D"], "DefaultWeight": [1, 1, 1, 1]})
+    splits = pd.DataFrame({
+        "ExpID": ["E1"] * 4,
+        "Participant": ["A", "B", "C", "D"],
+        "Included": [True] * 4,
+        # numeric 0 is falsy -> default weight; the text "0" is an explicit weight of 0
+        "WeightOverride": pd.Series([0, "0", "2", ""], dtype=object),
+    })
+    assert shares(compute_allocations(expenses, splits, participants)) == {"A": 225, "C": 450, "D": 225}
+
+
+def test_amount_base_keeps_float_rounding():
+    # Both products sit a hair off .5 in float; pin the float round(0) result
+    expenses = pd.DataFrame({
+        "Date": ["2024-01-02"] * 2,
+        "Currency": ["CNY"] * 2,
+        "Amount": [297.15, 321.85],
+    })
+    rates = pd.DataFrame({"Date": ["2024-01-01"], "Currency": ["CNY"], "Rate_to_Base": [26010.0]})
+    assert list(convert_expenses_to_base(expenses, rates)["Amount_Base"]) == [7728871, 8371319]
+
+
+@pytest.mark.parametrize("amount", [float("nan"), float("inf")])
+@pytest.mark.parametrize("currency", ["VND", "USD"])
+def test_non_finite_amount_raises(amount, currency):
+    expenses = pd.DataFrame({"Date": ["2024-01-02"], "Currency": [currency], "Amount": [amount]})
+    rates = pd.DataFrame({"Date": ["2024-01-01"], "Currency": ["USD"], "Rate_to_Base": [25000.0]})
+    with pytest.raises(pd.errors.IntCastingNaNError):
+        convert_expenses_to_base(expenses, rates)
+
+
+def test_cached_loads_are_isolated():
+    data = load_all_data("sample_data")
+    data["participants"].loc[0, "DefaultWeight"] = 99
+    balances = run_pipeline("sample_data")[2]
+    balances.loc[0, "Net_Base"] = 99
+    assert load_all_data("sample_data")["participants"].loc[0, "DefaultWeight"] == 1
+    assert run_pipeline("sample_data")[2].loc[0, "Net_Base"] == -1016375
+
+
+def test_missing_data_dir_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_all_data(str(tmp_path))
@@ -0,0 +1,106 @@
+# test_session_io.py
+"""
+Session snapshot parsing, including snapshots written by the original
+records-format writer (json.dumps, which emits bare NaN tokens), and CSV
+saving checked against the original to_csv writer.
+"""
+
+import json
+import math
+import types
+
+import pandas as pd
+import pytest
+
+import trip_splitter.session_io as session_io
+from trip_splitter.logic import load_all_data
+
+
+def baseline_snapshot() -> bytes:
+    # Same layout and serializer as the original session_to_json_bytes
+    data = load_all_data("sample_data")
+    payload = {
+        "dfs": {k: v.to_dict(orient="records") for k, v in data.items()},
+        "sort_prefs": {},
+        "auto_preview": True,
+        "data_dir": "sample_data",
+        "ts": 0.0,
+    }
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+class StrictJSONDecodeError(ValueError):
+    pass
+
+
+def strict_loads(buf):
+    # Rejects NaN/Infinity like orjson does
+    def reject(token):
+        raise StrictJSONDecodeError(f"unexpected character: {token}")
+    return json.loads(bytes(buf), parse_constant=reject)
+
+
+def check_payload(payload):
+    participants = payload["dfs"]["participants"]
+    assert [p["Name"] for p in participants] == ["Chi Quynh", "Chi Tam", "Chi Vy", "Duc Huy"]
+    assert all(math.isnan(p["Contact"]) for p in participants)
+    assert len(payload["dfs"]["expenses"]) == 23
+
+
+def test_baseline_snapshot_has_nan_tokens():
+    assert b"NaN" in baseline_snapshot()
+
+
+def test_parse_baseline_snapshot():
+    check_payload(session_io.parse_session_json(memoryview(baseline_snapshot())))
+
+
+def test_parse_baseline_snapshot_with_strict_parser(monkeypatch):
+    stub = types.SimpleNamespace(loads=strict_loads, JSONDecodeError=StrictJSONDecodeError)
+    monkeypatch.setattr(session_io, "orjson", stub)
+    check_payload(session_io.parse_session_json(baseline_snapshot()))
+
+
+def test_parse_baseline_snapshot_with_orjson(monkeypatch):
+    orjson = pytest.importorskip("orjson")
+    monkeypatch.setattr(session_io, "orjson", orjson)
+    check_payload(session_io.parse_session_json(bytearray(baseline_snapshot())))
+
+
+def baseline_csv(df: pd.DataFrame, path):
+    # Original save_df_csv; booleans spelled true/false like the sample files
+    df = df.dropna(how="all")
+    df = df[[c for c in df.columns if not str(c).startswith("__")]]
+    df = df.map(lambda v: str(v).lower() if isinstance(v, bool) else v)
+    df = df.fillna("")
+    df.to_csv(path, index=False)
+
+
+def save_csv(df: pd.DataFrame, path):
+    session_io.write_csv(df[[c for c in df.columns if not str(c).startswith("__")]], path)
+
+
+WHOLE_FLOATS = pd.DataFrame({
+    "Name": ["A", "B", "C"],
+    "DefaultWeight": [1.0, 2.0, 1.0],
+    "Amount": [150.0, float("nan"), 1e20],
+    "Date": pd.to_datetime(["2025-08-28", "2025-08-29", None]),
+})
+TIMES_OF_DAY = WHOLE_FLOATS.assign(Date=pd.to_datetime(["2025-08-28 10:30", "2025-08-29 00:00", None]))
+
+
+@pytest.mark.parametrize("name", ["participants", "rates", "expenses", "splits", "whole_floats", "times_of_day"])
+def test_write_csv_matches_baseline(name, tmp_path):
+    frames = dict(load_all_data("sample_data"), whole_floats=WHOLE_FLOATS, times_of_day=TIMES_OF_DAY)
+    df = frames[name]
+    baseline_csv(df, tmp_path / "baseline.csv")
+    save_csv(df, tmp_path / "saved.csv")
+    assert (tmp_path / "saved.csv").read_text() == (tmp_path / "baseline.csv").read_text()
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "saved.csv"), pd.read_csv(tmp_path / "baseline.csv"))
+
+
+def test_write_csv_keeps_whole_floats(tmp_path):
+    session_io.write_csv(WHOLE_FLOATS, tmp_path / "saved.csv")
+    reloaded = pd.read_csv(tmp_path / "saved.csv")
+    assert reloaded["DefaultWeight"].dtype == "float64"
+    assert (tmp_path / "saved.csv").read_text().splitlines()[1] == "A,1.0,150.0,2025-08-28"